@@ -2,18 +2,31 @@
 
 from dataclasses import dataclass
 from enum import Enum
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
 import os
+import io
+import re
+import sys
 import inspect
 import logging
+import functools
+import hashlib
+import shutil
+import threading
+import time
 import yaml
 import tempfile
+from types import MappingProxyType
 from typing import Optional
 
 from colorama import Fore, Style
 
+from packj import __version__
 from packj.util.net import __parse_url, download_file, check_site_exist, check_domain_popular
 from packj.util.dates import datetime_delta
-from packj.util.email_validity import check_email_address
+from packj.util.email_validity import check_email_address, check_email_domains
 from packj.util.files import write_json_to_file, read_from_csv, read_file_lines
 from packj.util.enum_util import PackageManagerEnum, LanguageEnum
 from packj.util.formatting import human_format
@@ -21,6 +34,7 @@ from packj.util.repo import git_clone, replace_last
 from packj.util.job_util import exec_command, in_docker, in_podman, is_mounted
 
 from packj.audit.parse_apis import parse_api_usage
+from packj.audit.osv import get_pkgver_vulns, get_pkgver_vulns_batch
 from packj.audit.parse_composition import parse_package_composition
 from packj.audit.pm_util import get_pm_enum, get_pm_install_cmd, get_pm_proxy
 from packj.audit.static_util import get_static_proxy_for_language
@@ -31,26 +45,108 @@ from packj.audit.report import generate_package_report, generate_summary
 
 THREAT_MODEL = {}
 
-def msg_info(x, end='\n', flush=True, indent=0):
+# metadata checks are I/O bound (registry APIs, DNS, OSV, git clone),
+# so run them concurrently, but bound concurrency to avoid rate-limits
+MAX_CONCURRENT_CHECKS = 4
+METADATA_TIMEOUT = 600
+
+POPULAR_HOSTING_SERVICES = (
+	'https://github.com/',
+	'https://gitlab.com/',
+	'git+https://github.com/',
+	'git://github.com/',
+	'https://bitbucket.com/',
+)
+
+# user-facing status output on a dedicated logger, so that configuring the
+# 'packj' namespace is unaffected; the handler writes and flushes each
+# message under a lock, so messages from concurrent threads are never torn apart
+log = logging.getLogger('packj.audit.status')
+if not log.handlers:
+	_handler = logging.StreamHandler(sys.stdout)
+	_handler.terminator = ''
+	_handler.setFormatter(logging.Formatter('%(message)s'))
+	log.addHandler(_handler)
+	log.setLevel(logging.INFO)
+	log.propagate = False
+
+KNOWN_HOSTS = frozenset({
+	'github.com',
+	'gitlab.com',
+	'bitbucket.org',
+	'readthedocs.io',
+	'readthedocs.org',
+})
+KNOWN_HOST_SUFFIXES = tuple(f'.{host}' for host in KNOWN_HOSTS)
+
+# git-specific URL schemes to rewrite as https (e.g., git+ssh://git@github.com/...)
+GIT_URL_SCHEME = re.compile(r'^(?:git\+https://|git://|git\+ssh://git@)')
+
+# static analysis outputs, keyed by package contents and analyzer toolchain;
+# set to None (--no-cache) to disable
+ASTGEN_CACHE_DIR = os.path.join(
+	os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+	'packj',
+	'astgen',
+)
+# an entry is complete once '.out' is in place, so it is published last
+ASTGEN_CACHE_SUFFIXES = ('.out.json', '.out')
+ASTGEN_CACHE_MAX_AGE = 30 * 86400
+ASTGEN_CACHE_MAX_SIZE = 1 << 30
+
+# per-thread output buffer, so that concurrent checks do not interleave
+_msg_buffer = threading.local()
+
+@contextmanager
+def buffered_output(buf):
+	_msg_buffer.buf = buf
+	try:
+		yield buf
+	finally:
+		_msg_buffer.buf = None
+
+def msg_print(x, end='\n'):
+	text = x + end
+	buf = getattr(_msg_buffer, 'buf', None)
+	if buf is not None:
+		buf.write(text)
+		return
+
+	# in-progress fragments (e.g., "Checking foo...") are shown right away on
+	# a terminal; otherwise they are held and emitted with their result line
+	text = getattr(_msg_buffer, 'pending', '') + text
+	if not text.endswith('\n') and not sys.stdout.isatty():
+		_msg_buffer.pending = text
+		return
+	_msg_buffer.pending = ''
+	log.info(text)
+
+def msg_info(x, end='\n', indent=0):
 	while indent > 0:
 		x = '   ' + x
 		indent -= 1
 	if end != '\n':
 		while len(x) < 40:
 			x += '.'
-		print(f'{Style.BRIGHT}[+]{Style.RESET_ALL} {x}', end=end, flush=flush)
+		msg_print(f'{Style.BRIGHT}[+]{Style.RESET_ALL} {x}', end=end)
 	else:
-		print(x, end=end, flush=flush)
+		msg_print(x, end=end)
 def msg_ok(x):
 	if len(x) > 50:
-		x = ''.join(x[0:46]) + ' ...'
+		x = x[:46] + ' ...'
 	msg_info(f'{Style.BRIGHT}{Fore.GREEN}PASS{Style.RESET_ALL} [{Fore.BLUE}{x}{Style.RESET_ALL}]')
 def msg_fail(x):
 	msg_info(f'{Style.BRIGHT}{Fore.YELLOW}FAIL{Style.RESET_ALL} [{x}]')
 def msg_alert(x):
 	msg_info(f'{Style.BRIGHT}{Fore.RED}RISK{Style.RESET_ALL} [{x}]')
 
-def build_threat_model(filename):
+@functools.lru_cache(maxsize=1)
+def load_threat_model(filename):
+	"""
+	Parse enabled alerts from @filename into a read-only alert -> category map.
+	Cached, so that the config is parsed only once per process.
+	"""
+	threat_model = {}
 	try:
 		with open(filename) as f:
 			config_data = yaml.safe_load(f)
@@ -60,27 +156,39 @@ def build_threat_model(filename):
 				for sub_category, sub_data in category_data.items():
 					for item in sub_data:
 						if item.get('enabled', None) == True:
-							THREAT_MODEL[sub_category] = category
+							threat_model[sys.intern(sub_category)] = sys.intern(category)
 							break
 	except Exception as e:
 		raise Exception(f'Failed to parse {filename}: {str(e)}')
 
-	if len(THREAT_MODEL) == 0:
-		raise Exception("No threat items in {filename} has been enabled")
+	if len(threat_model) == 0:
+		raise Exception(f'No threat items in {filename} has been enabled')
+	return MappingProxyType(threat_model)
 
+def build_threat_model(filename):
+	THREAT_MODEL.clear()
+	THREAT_MODEL.update(load_threat_model(filename))
+
+# @risks is a defaultdict(list) of risk category -> alerts
 def alert_user(alert_type, threat_model, reason, risks):
 	if alert_type in threat_model:
-		risk_cat = threat_model[alert_type]
-		if risk_cat not in risks:
-			risks[risk_cat] = []
+		items = risks[threat_model[alert_type]]
 		item = f'{alert_type}: {reason}'
-		if item not in risks[risk_cat]:
-			risks[risk_cat].append(item)
+		if item not in items:
+			items.append(item)
+	return risks
+
+def merge_risks(risks, other):
+	for risk_cat, other_items in other.items():
+		items = risks[risk_cat]
+		for item in other_items:
+			if item not in items:
+				items.append(item)
 	return risks
 
 def analyze_release_history(pm_proxy, pkg_name, pkg_info, risks, report, release_history=None):
 	try:
-		msg_info('Checking release history...', end='', flush=True, indent=1)
+		msg_info('Checking release history...', end='', indent=1)
 
 		# get package release history
 		if not release_history:
@@ -99,12 +207,11 @@ def analyze_release_history(pm_proxy, pkg_name, pkg_info, risks, report, release
 		report['num_releases'] = len(release_history)
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report, release_history
+	return risks, report, release_history
 
 def analyze_release_time(pm_proxy, pkg_name, ver_str, pkg_info, risks, report, release_history=None):
 	try:
-		msg_info('Checking release time gap...', end='', flush=True, indent=1)
+		msg_info('Checking release time gap...', end='', indent=1)
 
 		# get package release history
 		if not release_history:
@@ -124,12 +231,11 @@ def analyze_release_time(pm_proxy, pkg_name, ver_str, pkg_info, risks, report, r
 			msg_ok(release_info)
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_pkg_descr(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
 	try:
-		msg_info('Checking package description...', end='', flush=True, indent=1)
+		msg_info('Checking package description...', end='', indent=1)
 		descr = pm_proxy.get_description(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
 		if not descr:
 			reason = 'no description'
@@ -141,12 +247,11 @@ def analyze_pkg_descr(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
 		report['description'] = descr
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_version(ver_info, risks, report):
 	try:
-		msg_info('Checking version...', end='', flush=True)
+		msg_info('Checking version...', end='')
 
 		assert ver_info, 'no data!'
 
@@ -169,17 +274,15 @@ def analyze_version(ver_info, risks, report):
 		report['version'] = ver_info
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_cves(pm_name, pkg_name, ver_str, risks, report):
 	try:
-		msg_info('Checking for CVEs...', end='', flush=True)
-		from packj.audit.osv import get_pkgver_vulns
+		msg_info('Checking for CVEs...', end='')
 		vuln_list = get_pkgver_vulns(pm_name, pkg_name, ver_str)
 		if vuln_list:
 			alert_type = 'contains known vulnerabilities'
-			vulnerabilities = ','.join(vul['id'] for vul in vuln_list)
+			vulnerabilities = ','.join([vul['id'] for vul in vuln_list])
 			reason = f'contains {vulnerabilities}'
 			risks = alert_user(alert_type, THREAT_MODEL, reason, risks)
 			msg_alert(f'{len(vuln_list)} found')
@@ -189,12 +292,11 @@ def analyze_cves(pm_name, pkg_name, ver_str, risks, report):
 		report['vulnerabilities'] = vuln_list
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_deps(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report):
 	try:
-		msg_info('Checking dependencies...', end='', flush=True)
+		msg_info('Checking dependencies...', end='')
 		deps = pm_proxy.get_dependencies(pkg_name, ver_str=ver_str, pkg_info=pkg_info, ver_info=ver_info)
 		if deps and len(deps) > 10:
 			alert_type = 'too many dependencies'
@@ -205,12 +307,11 @@ def analyze_deps(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report)
 			msg_ok(f'{len(deps)} direct' if deps else 'none found')
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_downloads(pm_proxy, pkg_name, pkg_info, risks, report):
 	try:
-		msg_info('Checking downloads...', end='', flush=True)
+		msg_info('Checking downloads...', end='')
 		ret = pm_proxy.get_downloads(pkg_name, pkg_info)
 		assert ret != None, "N/A"
 		if ret < 1000:
@@ -220,12 +321,23 @@ def analyze_downloads(pm_proxy, pkg_name, pkg_info, risks, report):
 		msg_ok(f'{human_format(ret)} weekly')
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
+
+def is_popular_homepage(url, url_parts):
+	# skip the top domains lookup for well-known code/doc hosting sites:
+	# only the bare site is popular, project pages and subdomains are valid
+	host = url_parts.netloc.lower()
+	if host.startswith('www.'):
+		host = host[len('www.'):]
+	if host in KNOWN_HOSTS:
+		return url_parts.path in ('', '/')
+	if host.endswith(KNOWN_HOST_SUFFIXES):
+		return False
+	return check_domain_popular(url)
 
 def analyze_homepage(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
 	try:
-		msg_info('Checking homepage...', end='', flush=True)
+		msg_info('Checking homepage...', end='')
 		url = pm_proxy.get_homepage(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
 		if not url:
 			reason = 'no homepage'
@@ -246,7 +358,7 @@ def analyze_homepage(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
 				risks = alert_user(alert_type, THREAT_MODEL, reason, risks)
 
 			# check if a popular webpage
-			elif check_domain_popular(url):
+			elif is_popular_homepage(url, ret):
 				reason = 'invalid (popular) webpage'
 				alert_type = 'invalid or no homepage'
 				risks = alert_user(alert_type, THREAT_MODEL, reason, risks)
@@ -254,23 +366,22 @@ def analyze_homepage(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
 		report['homepage'] = url
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_repo_descr(risks, report):
 	try:
-		msg_info('Checking repo description...', end='', flush=True, indent=1)
+		msg_info('Checking repo description...', end='', indent=1)
 		descr = report['repo']['description']
 		msg_ok(descr)
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_repo_data(risks, report):
+	repo_data = None
 	try:
 		repo_url = report['repo']['url']
-		msg_info('Checking repo data...', end='', flush=True, indent=1)
+		msg_info('Checking repo data...', end='', indent=1)
 		err, repo_data	= fetch_repo_data(repo_url)
 		assert repo_data, err
 
@@ -308,7 +419,7 @@ def analyze_repo_data(risks, report):
 		return risks, report
 
 	try:
-		msg_info('Checking if repo is a forked copy...', end='', flush=True, indent=1)
+		msg_info('Checking if repo is a forked copy...', end='', indent=1)
 		if forked_from:
 			alert_type = 'source repo is a forked copy'
 			reason = f'forked from {forked_from}'
@@ -318,13 +429,12 @@ def analyze_repo_data(risks, report):
 			msg_ok('original, not forked')
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_repo_activity(risks, report):
 	try:
 		repo_url = report['repo']['url']
-		msg_info('Checking repo activity...', end='', flush=True, indent=1)
+		msg_info('Checking repo activity...', end='', indent=1)
 		reason, repo_data = git_clone(repo_url)
 		if reason:
 			alert_type = 'invalid or no source repo'
@@ -336,42 +446,29 @@ def analyze_repo_activity(risks, report):
 			report['repo'].update(repo_data)
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_repo_url(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report):
 	try:
-		msg_info('Checking repo URL...', end='', flush=True)
-		popular_hosting_services = (
-			'https://github.com/',
-			'https://gitlab.com/',
-			'git+https://github.com/',
-			'git://github.com/',
-			'https://bitbucket.com/',
-		)
+		msg_info('Checking repo URL...', end='')
 		repo_url = pm_proxy.get_repo(pkg_name, ver_str=ver_str, pkg_info=pkg_info, ver_info=ver_info)
 		if not repo_url:
 			repo_url = pm_proxy.get_homepage(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
-			if not repo_url or not repo_url.startswith(popular_hosting_services):
+			if not repo_url or not repo_url.startswith(POPULAR_HOSTING_SERVICES):
 				repo_url = None
 		if not repo_url:
 			repo_url = pm_proxy.get_download_url(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
-			if not repo_url or not repo_url.startswith(popular_hosting_services):
+			if not repo_url or not repo_url.startswith(POPULAR_HOSTING_SERVICES):
 				repo_url = None
 		if repo_url:
-			if repo_url.startswith('git+https://'):
-				repo_url = repo_url.lstrip('git+')
-			if repo_url.startswith('git://'):
-				repo_url = repo_url.replace('git://','https://')
-			if repo_url.startswith('git+ssh://git@'):
-				repo_url = repo_url.replace('git+ssh://git@','https://')
+			repo_url = GIT_URL_SCHEME.sub('https://', repo_url, count=1)
 			if repo_url.endswith('.git'):
 				repo_url = replace_last(repo_url, '.git', '')
 		if not repo_url:
 			reason = 'no source repo found'
 			alert_type = 'invalid or no source repo'
 			risks = alert_user(alert_type, THREAT_MODEL, reason, risks)
-		elif not repo_url.startswith(popular_hosting_services):
+		elif not repo_url.startswith(POPULAR_HOSTING_SERVICES):
 			reason = f'invalid source repo {repo_url}'
 			alert_type = 'invalid or no source repo'
 			risks = alert_user(alert_type, THREAT_MODEL, reason, risks)
@@ -381,12 +478,11 @@ def analyze_repo_url(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, rep
 		}
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_readme(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
 	try:
-		msg_info('Checking readme...', end='', flush=True)
+		msg_info('Checking readme...', end='')
 		readme = pm_proxy.get_readme(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
 		if not readme or len(readme) < 100:
 			reason = 'no readme' if not readme else 'insufficient readme'
@@ -397,12 +493,11 @@ def analyze_readme(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
 			msg_ok(f'{len(readme)} bytes')
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def analyze_author(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report):
 	try:
-		msg_info('Checking author...', end='', flush=True)
+		msg_info('Checking author...', end='')
 
 		# check author/maintainer email
 		authors = pm_proxy.get_author(pkg_name, ver_str=ver_str, pkg_info=pkg_info, ver_info=ver_info)
@@ -428,7 +523,8 @@ def analyze_author(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, repor
 		return risks, report
 
 	try:
-		msg_info('Checking email/domain validity...', end='', flush=True, indent=1)
+		msg_info('Checking email/domain validity...', end='', indent=1)
+		check_email_domains([author_info.get('email', None) for author_info in authors])
 		for author_info in authors:
 			email = author_info.get('email', None)
 			if not email:
@@ -436,7 +532,7 @@ def analyze_author(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, repor
 			try:
 				valid, valid_with_dns = check_email_address(email)
 			except Exception as e:
-				logging.debug('Failed to parse email %s: %s' % (email, str(e)))
+				logging.debug(f'Failed to parse email {email}: {str(e)}')
 				valid = False
 			if not valid or not valid_with_dns:
 				break
@@ -464,12 +560,82 @@ def analyze_author(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, repor
 			msg_ok(email)
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
+
+def analyze_release(pm_proxy, pkg_name, ver_str, pkg_info, risks, report):
+	risks, report, release_history = analyze_release_history(pm_proxy, pkg_name, pkg_info, risks, report)
+	return analyze_release_time(pm_proxy, pkg_name, ver_str, pkg_info, risks, report, release_history)
+
+def analyze_repo(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report):
+	risks, report = analyze_repo_url(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report)
+	if 'repo' in report and 'url' in report['repo'] and report['repo']['url']:
+		risks, report = analyze_repo_data(risks, report)
+		if 'description' in report['repo']:
+			risks, report = analyze_repo_descr(risks, report)
+		risks, report = analyze_repo_activity(risks, report)
+	return risks, report
+
+def download_package(pm_name, ver_info):
+	filepath = None
+	try:
+		msg_info(f"Downloading package from {pm_name}...", end='')
+		filepath, size = download_file(ver_info['url'])
+		msg_ok(f'{float(size)/1024:.2f} KB')
+	except KeyError:
+		msg_fail('URL missing')
+	except Exception as e:
+		msg_fail(str(e))
+	return filepath
+
+def run_check(buf, check, *args):
+	with buffered_output(buf):
+		return check(*args)
+
+def start_check(sem, future, buf, check, args):
+	def worker():
+		with sem:
+			if not future.set_running_or_notify_cancel():
+				return
+			try:
+				future.set_result(run_check(buf, check, *args, defaultdict(list), {}))
+			except BaseException as e:
+				future.set_exception(e)
+
+	# daemon, so that a hung check (e.g., git clone) cannot block exit
+	threading.Thread(target=worker, daemon=True).start()
+
+def analyze_metadata(checks, timeout=METADATA_TIMEOUT):
+	"""
+	Run metadata checks concurrently. Each check gets its own risks/report
+	dicts and output buffer. Yields (risks, report, output) in the order of
+	@checks, as soon as a check and all checks before it have completed.
+	Checks not done within @timeout seconds are reported as timed out.
+	"""
+	sem = threading.BoundedSemaphore(MAX_CONCURRENT_CHECKS)
+	deadline = time.monotonic() + timeout
+
+	pending = []
+	for check, args in checks:
+		future, buf = Future(), io.StringIO()
+		start_check(sem, future, buf, check, args)
+		pending.append((check, future, buf))
+
+	for check, future, buf in pending:
+		try:
+			risks, report = future.result(timeout=max(0, deadline - time.monotonic()))
+		except FutureTimeoutError:
+			# not started checks are dropped, running ones are abandoned
+			future.cancel()
+			with buffered_output(buf):
+				if not buf.tell():
+					msg_info(f'Running {check.__name__}...', end='')
+				msg_fail('timed out')
+			risks, report = defaultdict(list), {}
+		yield risks, report, buf.getvalue()
 
 def analyze_composition(pm_name, pkg_name, ver_str, filepath, risks, report):
 	try:
-		msg_info('Checking files/funcs...', end='', flush=True)
+		msg_info('Checking files/funcs...', end='')
 
 		if pm_name == 'pypi':
 			language=LanguageEnum.python
@@ -501,8 +667,7 @@ def analyze_composition(pm_name, pkg_name, ver_str, filepath, risks, report):
 		}
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 
 class Risk(tuple, Enum):
@@ -531,13 +696,135 @@ ALERTS = {
 	'SOURCE_OBFUSCATION': Alert(Risk.HIDDEN, 'reads hidden code'),
 	'SOURCE_SETTINGS': Alert(Risk.ENV_READ, 'reads system settings or environment variables'),
 	'SINK_UNCLASSIFIED': Alert(Risk.ENV_WRITE, 'modifies system settings or environment variables'),
+	'SINK_SYSTEM': Alert(Risk.ENV_WRITE, 'modifies system settings or environment variables'),
+	'SOURCE_UNCLASSIFIED': Alert(Risk.FILE_IO, 'reads files and dirs'),
 	'SOURCE_ACCOUNT': Alert(Risk.ENV_WRITE, 'modifies system settings or environment variables'),
 	'SOURCE_USER_INPUT': Alert(Risk.USER_IO),
 }
 
+@functools.lru_cache(maxsize=None)
+def get_astgen_toolchain_digest(system):
+	"""
+	Digest of everything besides the package that determines astgen output:
+	packj version, analyzer sources, and the interpreters that run them.
+	"""
+	digest = hashlib.sha256(f'{__version__}:{sys.version}:{system}:'.encode('utf-8'))
+	tool = shutil.which(system)
+	if tool:
+		tool = os.path.realpath(tool)
+		st = os.stat(tool)
+		digest.update(f'{tool}:{st.st_size}:{st.st_mtime_ns}:'.encode('utf-8'))
+	cwd = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+	static_dir = os.path.join(cwd, 'static_proxy')
+	for name in sorted(os.listdir(static_dir)):
+		if name.endswith(('.py', '.rb')):
+			digest.update(name.encode('utf-8'))
+			with open(os.path.join(static_dir, name), 'rb') as f:
+				digest.update(f.read())
+	return digest.hexdigest()
+
+def get_astgen_cache_key(filepath, configpath, pkg_name, ver_str, system):
+	digest = hashlib.sha256(f'{get_astgen_toolchain_digest(system)}:{pkg_name}:{ver_str}:'.encode('utf-8'))
+	for path in (configpath, filepath):
+		with open(path, 'rb') as f:
+			for chunk in iter(lambda: f.read(1<<20), b''):
+				digest.update(chunk)
+	return digest.hexdigest()
+
+def remove_astgen_cache_entry(paths):
+	# drop the '.out' marker first, so that a partially removed entry is a miss
+	for path in sorted(paths, key=lambda path: not path.endswith('.out')):
+		os.remove(path)
+
+def prune_astgen_cache(max_age=ASTGEN_CACHE_MAX_AGE, max_size=ASTGEN_CACHE_MAX_SIZE):
+	"""
+	Remove cached astgen entries not used in @max_age seconds, then the
+	least recently used ones until the cache fits in @max_size bytes.
+	"""
+	if not ASTGEN_CACHE_DIR or not os.path.isdir(ASTGEN_CACHE_DIR):
+		return
+
+	# group files by cache key, so that entries are removed as a whole
+	files = defaultdict(list)
+	for entry in os.scandir(ASTGEN_CACHE_DIR):
+		try:
+			st = entry.stat()
+		except OSError as e:
+			logging.debug(f'Failed to prune astgen cache: {str(e)}')
+			continue
+		key = entry.name
+		for suffix in ASTGEN_CACHE_SUFFIXES:
+			if key.endswith(suffix):
+				key = key[:-len(suffix)]
+				break
+		files[key].append((entry.path, st))
+
+	now = time.time()
+	entries = []
+	for key_files in files.values():
+		paths = [path for path, _ in key_files]
+		mtime = max(st.st_mtime for _, st in key_files)
+		size = sum(st.st_size for _, st in key_files)
+		if now - mtime > max_age:
+			try:
+				remove_astgen_cache_entry(paths)
+			except OSError as e:
+				logging.debug(f'Failed to prune astgen cache: {str(e)}')
+		else:
+			entries.append((mtime, size, paths))
+
+	total = sum(size for _, size, _ in entries)
+	for _, size, paths in sorted(entries):
+		if total <= max_size:
+			break
+		try:
+			remove_astgen_cache_entry(paths)
+			total -= size
+		except OSError as e:
+			logging.debug(f'Failed to prune astgen cache: {str(e)}')
+
+def astgen_cached(static, filepath, configpath, pkg_name, ver_str, system):
+	"""
+	Run astgen on the package at @filepath, reusing outputs cached on disk
+	under ASTGEN_CACHE_DIR for the same package contents, config and
+	analyzer toolchain (@system).
+	"""
+	suffixes = ASTGEN_CACHE_SUFFIXES
+	cached = None
+	if ASTGEN_CACHE_DIR:
+		try:
+			key = get_astgen_cache_key(filepath, configpath, pkg_name, ver_str, system)
+			cached = [os.path.join(ASTGEN_CACHE_DIR, key + suffix) for suffix in suffixes]
+			# a partially pruned entry is a miss
+			if all(os.path.exists(cached_path) for cached_path in cached):
+				for suffix, cached_path in zip(suffixes, cached):
+					shutil.copyfile(cached_path, filepath + suffix)
+					# mark as recently used for pruning
+					os.utime(cached_path)
+				return
+		except Exception as e:
+			logging.debug(f'Failed to look up astgen cache: {str(e)}')
+
+	static.astgen(inpath=filepath, outfile=filepath+'.out', root=None, configpath=configpath,
+		pkg_name=pkg_name, pkg_version=ver_str, evaluate_smt=False)
+
+	if not cached or not all(os.path.exists(filepath + suffix) for suffix in suffixes):
+		return
+
+	# atomically publish to cache, in ASTGEN_CACHE_SUFFIXES order
+	try:
+		os.makedirs(ASTGEN_CACHE_DIR, exist_ok=True)
+		for suffix, cached_path in zip(suffixes, cached):
+			fd, tmp_path = tempfile.mkstemp(dir=ASTGEN_CACHE_DIR)
+			os.close(fd)
+			shutil.copyfile(filepath + suffix, tmp_path)
+			os.replace(tmp_path, cached_path)
+	except Exception as e:
+		logging.debug(f'Failed to update astgen cache: {str(e)}')
+
 def analyze_apis(pm_name, pkg_name, ver_str, filepath, risks, report):
 	try:
-		msg_info('Analyzing code...', end='', flush=True)
+		msg_info('Analyzing code...', end='')
 		cwd = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 		config_dir= os.path.join(cwd, 'config')
 		if pm_name == 'pypi':
@@ -557,11 +844,10 @@ def analyze_apis(pm_name, pkg_name, ver_str, filepath, risks, report):
 
 		static = get_static_proxy_for_language(language=language)
 		try:
-			static.astgen(inpath=filepath, outfile=filepath+'.out', root=None, configpath=configpath,
-				pkg_name=pkg_name, pkg_version=ver_str, evaluate_smt=False)
+			astgen_cached(static, filepath, configpath, pkg_name, ver_str, system)
 		except Exception as e:
 			logging.debug('Failed to parse: %s', str(e))
-			raise Exception('parse error: is %s installed?' % (system))
+			raise Exception(f'parse error: is {system} installed?')
 
 		assert os.path.exists(filepath+'.out'), 'parse error!'
 
@@ -570,10 +856,13 @@ def analyze_apis(pm_name, pkg_name, ver_str, filepath, risks, report):
 			msg_ok('no perms found')
 			return risks, report
 
-		report_data = {}
+		report_data = defaultdict(list)
 		perms_needed = set()
 		for p, usage in perms.items():
-			alert = ALERTS[p]
+			alert = ALERTS.get(p, None)
+			if not alert:
+				logging.debug(f'No alert defined for {p}, ignoring')
+				continue
 			alert_type, needs_perm = alert.risk
 			reason = alert.desc or alert_type
 
@@ -582,21 +871,17 @@ def analyze_apis(pm_name, pkg_name, ver_str, filepath, risks, report):
 				perms_needed.add(needs_perm)
 
 			# report
-			if reason not in report_data:
-				report_data[reason] = usage
-			else:
-				report_data[reason] += usage
+			report_data[reason].extend(usage)
 
 		msg_alert(f'needs {len(perms_needed)} perm(s): {",".join(perms_needed)}')
-		report['permissions'] = report_data
+		report['permissions'] = dict(report_data)
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def trace_installation(pm_enum, pkg_name, ver_str, report_dir, risks, report):
 	try:
-		msg_info('Installing package and tracing code...', end='', flush=True)
+		msg_info('Installing package and tracing code...', end='')
 
 		# look for strace binary
 		check_strace_cmd = ['which', 'strace']
@@ -634,8 +919,7 @@ def trace_installation(pm_enum, pkg_name, ver_str, report_dir, risks, report):
 		msg_ok(f'found {out} syscalls')
 	except Exception as e:
 		msg_fail(str(e))
-	finally:
-		return risks, report
+	return risks, report
 
 def audit(pm_args, pkg_name, ver_str, report_dir, extra_args):
 
@@ -648,8 +932,8 @@ def audit(pm_args, pkg_name, ver_str, report_dir, extra_args):
 
 	# get version metadata
 	try:
-		msg_info(f"Fetching '{pkg_name}' from {pm_name}...", end='', flush=True)
-		pkg_name, pkg_info = pm_proxy.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+		msg_info(f"Fetching '{pkg_name}' from {pm_name}...", end='')
+		pkg_name, pkg_info = pm_proxy.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info, 'package not found!'
 
 		ver_info = pm_proxy.get_version(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
@@ -663,7 +947,7 @@ def audit(pm_args, pkg_name, ver_str, report_dir, extra_args):
 		msg_fail(str(e))
 		return None
 
-	risks = {}
+	risks = defaultdict(list)
 	report = {
 		'pm_name' : pm_name,
 		'pkg_name' : pkg_name,
@@ -671,37 +955,31 @@ def audit(pm_args, pkg_name, ver_str, report_dir, extra_args):
 	}
 
 	# analyze metadata
-	risks, report = analyze_pkg_descr(pm_proxy, pkg_name, ver_str, pkg_info, risks, report)
-	risks, report, release_history = analyze_release_history(pm_proxy, pkg_name, pkg_info, risks, report)
-	risks, report = analyze_version(ver_info, risks, report)
-	risks, report = analyze_release_time(pm_proxy, pkg_name, ver_str, pkg_info, risks, report, release_history)
-	risks, report = analyze_author(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report)
-	risks, report = analyze_readme(pm_proxy, pkg_name, ver_str, pkg_info, risks, report)
-	risks, report = analyze_homepage(pm_proxy, pkg_name, ver_str, pkg_info, risks, report)
-	risks, report = analyze_downloads(pm_proxy, pkg_name, pkg_info, risks, report)
-	risks, report = analyze_repo_url(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report)
-	if 'repo' in report and 'url' in report['repo'] and report['repo']['url']:
-		risks, report = analyze_repo_data(risks, report)
-		if 'description' in report['repo']:
-			risks, report = analyze_repo_descr(risks, report)
-		risks, report = analyze_repo_activity(risks, report)
-	risks, report = analyze_cves(pm_name, pkg_name, ver_str, risks, report)
-	risks, report = analyze_deps(pm_proxy, pkg_name, ver_str, pkg_info, ver_info, risks, report)
-
-	# download package
-	filepath = None
-	try:
-		msg_info(
-			f"Downloading package from {pm_name}...",
-			end='',
-			flush=True
-		)
-		filepath, size = download_file(ver_info['url'])
-		msg_ok(f'{float(size)/1024:.2f} KB')
-	except KeyError:
-		msg_fail('URL missing')
-	except Exception as e:
-		msg_fail(str(e))
+	checks = (
+		(analyze_pkg_descr, (pm_proxy, pkg_name, ver_str, pkg_info)),
+		(analyze_release, (pm_proxy, pkg_name, ver_str, pkg_info)),
+		(analyze_version, (ver_info,)),
+		(analyze_author, (pm_proxy, pkg_name, ver_str, pkg_info, ver_info)),
+		(analyze_readme, (pm_proxy, pkg_name, ver_str, pkg_info)),
+		(analyze_homepage, (pm_proxy, pkg_name, ver_str, pkg_info)),
+		(analyze_downloads, (pm_proxy, pkg_name, pkg_info)),
+		(analyze_repo, (pm_proxy, pkg_name, ver_str, pkg_info, ver_info)),
+		(analyze_cves, (pm_name, pkg_name, ver_str)),
+		(analyze_deps, (pm_proxy, pkg_name, ver_str, pkg_info, ver_info)),
+	)
+
+	# download package in the background, while metadata is being analyzed
+	download_buf = io.StringIO()
+	with ThreadPoolExecutor(max_workers=1) as executor:
+		download = executor.submit(run_check, download_buf, download_package, pm_name, ver_info)
+
+		for check_risks, check_report, output in analyze_metadata(checks):
+			msg_print(output, end='')
+			risks = merge_risks(risks, check_risks)
+			report.update(check_report)
+
+		filepath = download.result()
+	msg_print(download_buf.getvalue(), end='')
 
 	# perform static analysis
 	if filepath:
@@ -721,7 +999,7 @@ def audit(pm_args, pkg_name, ver_str, report_dir, extra_args):
 			f'{sum(len(v) for v in risks.values())} risk(s) found, '
 			f'package is {", ".join(risks.keys())}!'
 		)
-		report['risks'] = risks
+		report['risks'] = dict(risks)
 
 	# generate final report
 	args = (container_mountpoint, report_dir, host_volume)
@@ -732,6 +1010,8 @@ def audit(pm_args, pkg_name, ver_str, report_dir, extra_args):
 		msg_info(f'=> View pre-vetted package report at https://packj.dev/package/PyPi/{pkg_name}/{ver_str}')
 	return report
 
+# one proxy per package manager, so that its metadata cache is shared across packages
+@functools.lru_cache(maxsize=None)
 def __get_pm_args(pm_name):
 	pm_name = pm_name.lower()
 	pm_enum = get_pm_enum(pm_name)
@@ -817,13 +1097,31 @@ def parse_request_args(args):
 	return audit_pkg_list, report_dir, (host_volume, container_mountpoint, install_trace)
 
 def main(args, config_file):
+	global ASTGEN_CACHE_DIR
 
 	# get user threat model
 	build_threat_model(config_file)
 
+	# reuse static analysis outputs across runs, unless opted out
+	if args.no_cache:
+		ASTGEN_CACHE_DIR = None
+	else:
+		try:
+			prune_astgen_cache()
+		except Exception as e:
+			logging.debug(f'Failed to prune astgen cache: {str(e)}')
+
 	# parse input
 	audit_pkg_list, report_dir, cmd_args = parse_request_args(args)
 
+	# look up CVEs for all pinned packages in one go
+	pinned_pkgs = [(pm_args[1], pkg_name, ver_str) for pm_args, pkg_name, ver_str in audit_pkg_list if ver_str]
+	if len(pinned_pkgs) > 1:
+		try:
+			get_pkgver_vulns_batch(pinned_pkgs)
+		except Exception as e:
+			logging.debug(f'Failed to prefetch CVEs: {str(e)}')
+
 	# audit each package
 	reports = []
 	for pkg_info in audit_pkg_list:
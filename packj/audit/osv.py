@@ -1,8 +1,18 @@
-import requests
 import urllib
 from re import match
+from concurrent.futures import ThreadPoolExecutor
 
-def __fetch_vuln_data(pm_name, pkg_name, ver_str):
+from packj.util.net import get_session
+
+OSV_API_URL = 'https://api.osv.dev/v1'
+
+# max number of queries accepted by OSV in a single querybatch request
+OSV_QUERY_BATCH_SIZE = 1000
+
+# (ecosystem, package name, version) -> list of vulnerabilities
+__vuln_cache = {}
+
+def __get_ecosystem(pm_name):
 	if pm_name.lower() == 'pypi':
 		pm_name = 'PyPI'
 	elif pm_name.lower() == 'npm':
@@ -10,57 +20,112 @@ def __fetch_vuln_data(pm_name, pkg_name, ver_str):
 	elif pm_name.lower() == 'rubygems':
 		pm_name = 'RubyGems'
 	assert pm_name in ['PyPI', 'npm', 'RubyGems'], "Package manager %s not supported" % (pm_name)
-	data = {
+	return pm_name
+
+def __get_query(pm_name, pkg_name, ver_str):
+	return {
 		"version": ver_str,
 		"package": {
 			"name": pkg_name.lower(),
-			"ecosystem": pm_name,
+			"ecosystem": __get_ecosystem(pm_name),
 		}
 	}
-	url = 'https://api.osv.dev/v1/query'
-	resp = requests.post(url=url, json=data)
+
+def __get_cache_key(query):
+	return (query['package']['ecosystem'], query['package']['name'], query['version'])
+
+def __fetch_vuln_data(pm_name, pkg_name, ver_str):
+	data = __get_query(pm_name, pkg_name, ver_str)
+	url = f'{OSV_API_URL}/query'
+	resp = get_session().post(url=url, json=data)
+	resp.raise_for_status()
+	return resp.json()
+
+def __fetch_vuln(vuln_id):
+	url = f'{OSV_API_URL}/vulns/{vuln_id}'
+	resp = get_session().get(url=url)
 	resp.raise_for_status()
 	return resp.json()
 
+def __parse_vuln_data(vuln_data_list):
+	assert isinstance(vuln_data_list, list), "invalid CVE data format: not a list!"
+
+	vuln_list = []
+	for vuln_data in vuln_data_list:
+
+		# get a vulnerability ID
+		try:
+			vuln_ids = vuln_data['aliases']
+		except KeyError:
+			vuln_ids = None
+			continue
+
+		# pick one, preference for CVEs
+		cves = list(filter(lambda v: match('^CVE-.+$', v), vuln_ids))
+		if cves:
+			vuln_id = cves[0]
+		else:
+			vuln_id = vuln_ids[0]
+
+		# source
+		try:
+			vuln_ref_url = vuln_data['references'][0]['url']
+		except KeyError:
+			vuln_ref_url = None
+
+		vuln_list.append({
+			'id'		: vuln_id,
+			'ref_url'	: vuln_ref_url,
+		})
+	return vuln_list
+
+def get_pkgver_vulns_batch(pkg_list, max_workers=8):
+	"""
+	Look up vulnerabilities for a list of (pm_name, pkg_name, ver_str) using
+	OSV querybatch, which returns vuln IDs only; vuln details are then fetched
+	concurrently, once per unique ID. Results are cached for get_pkgver_vulns().
+	"""
+	try:
+		queries = [__get_query(*pkg) for pkg in pkg_list]
+
+		# query in batches, collecting vuln IDs per package
+		results = []
+		for idx in range(0, len(queries), OSV_QUERY_BATCH_SIZE):
+			batch = queries[idx:idx+OSV_QUERY_BATCH_SIZE]
+			resp = get_session().post(url=f'{OSV_API_URL}/querybatch', json={"queries": batch})
+			resp.raise_for_status()
+			batch_results = resp.json().get('results', [])
+			assert len(batch_results) == len(batch), "invalid CVE data format: results mismatch!"
+			results.extend(batch_results)
+
+		# fetch details for each unique vuln
+		vuln_ids = {v['id'] for result in results for v in result.get('vulns', [])}
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			vulns = dict(zip(vuln_ids, executor.map(__fetch_vuln, vuln_ids)))
+
+		ret = []
+		for query, result in zip(queries, results):
+			vuln_list = __parse_vuln_data([vulns[v['id']] for v in result.get('vulns', [])])
+			# paginated (incomplete) results are left to get_pkgver_vulns()
+			if not result.get('next_page_token', None):
+				__vuln_cache[__get_cache_key(query)] = vuln_list
+			ret.append(vuln_list)
+		return ret
+	except Exception as e:
+		raise Exception("Failed to get CVEs: %s" % (str(e)))
+
 def get_pkgver_vulns(pm_name, pkg_name, ver_str):
-	vuln_data = None
 	try:
+		key = __get_cache_key(__get_query(pm_name, pkg_name, ver_str))
+		if key in __vuln_cache:
+			return __vuln_cache[key]
+
 		vuln_data_dict = __fetch_vuln_data(pm_name, pkg_name, ver_str)
 		if not len(vuln_data_dict):
 			return []
 		assert 'vulns' in vuln_data_dict, "invalid CVE data format: 'vulns' missing!"
 
-		vuln_data_list = vuln_data_dict['vulns']
-		assert isinstance(vuln_data_list, list), "invalid CVE data format: not a list!"
-
-		vuln_list = []
-		for vuln_data in vuln_data_list:
-
-			# get a vulnerability ID
-			try:
-				vuln_ids = vuln_data['aliases']
-			except KeyError:
-				vuln_ids = None
-				continue
-
-			# pick one, preference for CVEs
-			cves = list(filter(lambda v: match('^CVE-.+$', v), vuln_ids))
-			if cves:
-				vuln_id = cves[0]
-			else:
-				vuln_id = vuln_ids[0]
-
-			# source
-			try:
-				vuln_ref_url = vuln_data['references'][0]['url']
-			except KeyError:
-				vuln_ref_url = None
-
-			vuln_list.append({
-				'id'		: vuln_id,
-				'ref_url'	: vuln_ref_url,
-			})
-		return vuln_list
+		return __parse_vuln_data(vuln_data_dict['vulns'])
 	except Exception as e:
 		raise Exception("Failed to get CVEs: %s" % (str(e)))
 
@@ -1,9 +1,17 @@
 import os
+import sys
 import inspect
+import functools
+from collections import defaultdict
+from types import MappingProxyType
 
 from packj.util.files import read_from_csv, read_json_from_file
- 
-def parse_api_usage(pm_name, filepath):
+
+@functools.lru_cache(maxsize=None)
+def load_apis2perms(pm_name):
+	"""
+	Read-only API -> permission map for @pm_name, parsed once per process.
+	"""
 	cwd = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 	config_dir= os.path.join(cwd, 'config')
 	if pm_name == 'pypi':
@@ -23,9 +31,13 @@ def parse_api_usage(pm_name, filepath):
 		api = line[0]
 		perm = line[1]
 		if api not in apis2perms:
-			apis2perms[api] = perm
+			apis2perms[api] = sys.intern(perm)
+	return MappingProxyType(apis2perms)
 
-	perms = {}
+def parse_api_usage(pm_name, filepath):
+	apis2perms = load_apis2perms(pm_name)
+
+	perms = defaultdict(list)
 
 	usage_data = read_json_from_file(filepath)
 	if not usage_data or 'pkgs' not in usage_data or \
@@ -34,24 +46,21 @@ def parse_api_usage(pm_name, filepath):
 		'apiResults' not in usage_data['pkgs'][0]:
 		return None
 
+	# hot loop over every API call site: bind lookups to locals
+	get_perm = apis2perms.get
 	for api_usage in usage_data['pkgs'][0]['apiResults']:
-		api = api_usage['fullName']
+		p = get_perm(api_usage['fullName'], None)
+		if not p:
+			continue
 		try:
+			start = api_usage['range']['start']
 			usage = {
-				"filepath": api_usage['range']['start']['fileInfo']['file'],
+				"filepath": start['fileInfo']['file'],
 				"api_name" : api_usage['name'],
-				"lineno": str(api_usage['range']['start']['row']),
+				"lineno": str(start['row']),
 			}
 		except:
-			usage = None
+			continue
 
-		try:
-			p = apis2perms[api]
-		except KeyError:
-			p = None
-
-		if p and usage:
-			if p not in perms:
-				perms[p] = []
-			perms[p].append(usage)
-	return perms
+		perms[p].append(usage)
+	return dict(perms)
@@ -9,8 +9,8 @@ from os.path import join, exists
 import shutil
 import tempfile
 import dateutil.parser
-import requests
 
+from packj.util.net import get_session
 from packj.audit.pm_proxy.pm_base import PackageManagerProxy
 
 class NpmjsProxy(PackageManagerProxy):
@@ -61,7 +61,7 @@ class NpmjsProxy(PackageManagerProxy):
 	def get_downloads(self, pkg_name, pkg_info):
 		try:
 			url = 'https://api.npmjs.org/downloads/point/last-week/' + pkg_name
-			r = requests.get(url)
+			r = get_session().get(url)
 			r.raise_for_status()
 			res = r.json()
 			return int(res['downloads'])
@@ -73,7 +73,7 @@ class NpmjsProxy(PackageManagerProxy):
 		# fetch metadata from json api
 		try:
 			metadata_url = "https://registry.npmjs.org/%s" % (pkg_name)
-			resp = requests.request('GET', metadata_url)
+			resp = get_session().request('GET', metadata_url)
 			resp.raise_for_status()
 			pkg_info = resp.json()
 			if pkg_info:
@@ -89,14 +89,14 @@ class NpmjsProxy(PackageManagerProxy):
 
 	def get_homepage(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 		assert pkg_info and isinstance(pkg_info, dict), "invalid metadata!"
 		return pkg_info.get('homepage', None)
 
 	def get_release_history(self, pkg_name, pkg_info=None, max_num=-1):
 		from packj.util.dates import datetime_delta, datetime_to_date_str
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 		assert pkg_info and 'time' in pkg_info, "package not found!"
 
 		history = {}
@@ -126,7 +126,7 @@ class NpmjsProxy(PackageManagerProxy):
 
 	def get_version(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 		assert pkg_info and 'versions' in pkg_info, "package not found!"
 		try:
 			if not ver_str:
@@ -156,7 +156,7 @@ class NpmjsProxy(PackageManagerProxy):
 	def get_repo(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		if not ver_info or 'repository' not in ver_info:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 			assert pkg_info and 'versions' in pkg_info, "package not found!"
 			ver_info = self.get_version(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
 		assert ver_info and 'repository' in ver_info, "invalid version metadata!"
@@ -170,7 +170,7 @@ class NpmjsProxy(PackageManagerProxy):
 	def get_dependencies(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 			assert pkg_info and 'versions' in pkg_info, "invalid metadata!"
 			if not ver_info:
 				ver_info = self.get_version(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
@@ -182,13 +182,13 @@ class NpmjsProxy(PackageManagerProxy):
 
 	def get_description(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 		assert pkg_info and isinstance(pkg_info, dict), "invalid metadata!"
 		return pkg_info.get('description', None)
 
 	def get_readme(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 		assert pkg_info and isinstance(pkg_info, dict), "invalid metadata!"
 		return pkg_info.get('readme', None)
 
@@ -220,7 +220,7 @@ class NpmjsProxy(PackageManagerProxy):
 	def get_maintainers(self, pkg_name:str, ver_str:str=None, pkg_info:dict=None, ver_info:dict=None):
 		if not ver_info:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 			assert pkg_info and 'versions' in pkg_info, "invalid metadata!"
 
 			ver_info = self.get_version(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
@@ -232,7 +232,7 @@ class NpmjsProxy(PackageManagerProxy):
 	def get_author(self, pkg_name:str, ver_str:str=None, pkg_info:dict=None, ver_info:dict=None):
 		if not ver_info:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 			assert pkg_info and 'versions' in pkg_info, "invalid metadata!"
 
 			ver_info = self.get_version(pkg_name, ver_str=ver_str, pkg_info=pkg_info)
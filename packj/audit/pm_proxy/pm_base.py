@@ -6,6 +6,8 @@ import pickle
 import datetime
 import networkx
 import itertools
+import threading
+from collections import OrderedDict
 from os.path import splitext, exists, join, basename
 from packj.util.job_util import read_proto_from_file
 
@@ -22,11 +24,31 @@ class PackageManagerProxy(object):
 		self.metadata_format = None
 		self.dep_format = None
 		self.name = 'pypi'
+		self._query_cache = OrderedDict()
+		self._query_cache_size = 256
+		self._query_cache_lock = threading.Lock()
 
 	def get_metadata(self, pkg_name, pkg_version=None):
 		# load the metadata information for a package or get and cache it in cache_dir
 		pass
 
+	def get_cached_metadata(self, pkg_name, pkg_version=None):
+		# memoized get_metadata(), so that a package is fetched at most once
+		# no matter how many get_* calls need its metadata
+		key = (pkg_name, pkg_version)
+		with self._query_cache_lock:
+			if key in self._query_cache:
+				self._query_cache.move_to_end(key)
+				return self._query_cache[key]
+
+		pkg_name, pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=pkg_version)
+		if pkg_info:
+			with self._query_cache_lock:
+				self._query_cache[key] = (pkg_name, pkg_info)
+				while len(self._query_cache) > self._query_cache_size:
+					self._query_cache.popitem(last=False)
+		return pkg_name, pkg_info
+
 	def get_versions(self, pkg_name, max_num=15, min_gap_days=30, with_time=False):
 		# read the metadata and get (major) versions of the specified package
 		pass
@@ -5,10 +5,10 @@ import json
 import logging
 import re
 import os
-import requests
 import dateutil.parser
 from os.path import join, exists
 
+from packj.util.net import get_session
 from packj.util.files import read_file_lines
 from packj.util.json_wrapper import json_loads
 from packj.audit.pm_proxy.pm_base import PackageManagerProxy
@@ -30,7 +30,6 @@ class PypiProxy(PackageManagerProxy):
 		self.isolate_pkg_info = isolate_pkg_info
 		self.metadata_format = 'json'
 		self.dep_format = 'requirement'
-		self._query_cache = {}
 
 	def get_metadata(self, pkg_name, pkg_version=None):
 		# PyPI json api
@@ -44,7 +43,7 @@ class PypiProxy(PackageManagerProxy):
 			metadata_url = f'https://pypi.python.org/pypi/{pkg_name}/json'
 
 		try:
-			resp = requests.request('GET', metadata_url)
+			resp = get_session().request('GET', metadata_url)
 			resp.raise_for_status()
 			pkg_info = resp.json()
 			if pkg_info:
@@ -88,7 +87,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_release_history(self, pkg_name, pkg_info=None, max_num=-1):
 		from packj.util.dates import datetime_delta, datetime_to_date_str
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 		assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 		# skip versions that don't have a distribution
 		ver_dists = [(ver, dists) for ver, dists in pkg_info['releases'].items() if len(dists) > 0]
@@ -117,7 +116,7 @@ class PypiProxy(PackageManagerProxy):
 
 	def get_version(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 		if not ver_str:
 			ver_str = pkg_info['info']['version']
@@ -140,7 +139,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_description(self, pkg_name, ver_str=None, pkg_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 			return pkg_info['info']['summary']
 		except Exception as e:
@@ -150,7 +149,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_readme(self, pkg_name, ver_str=None, pkg_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 			return pkg_info['info']['description']
 		except Exception as e:
@@ -160,7 +159,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_dependencies(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 			return pkg_info['info']['requires_dist']
 		except KeyError:
@@ -172,7 +171,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_download_url(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 			try:
 				info = pkg_info['info']
@@ -188,7 +187,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_repo(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 			try:
 				info = pkg_info['info']
@@ -207,7 +206,7 @@ class PypiProxy(PackageManagerProxy):
 			USER_AGENT = "pypistats/0.11.0"
 			endpoint = "packages/" + pkg_name + "/recent"
 			url = BASE_URL + endpoint.lower()
-			r = requests.get(url, headers={"User-Agent": USER_AGENT})
+			r = get_session().get(url, headers={"User-Agent": USER_AGENT})
 			r.raise_for_status()
 			res = r.json()
 			return int(res["data"]["last_week"])
@@ -218,7 +217,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_homepage(self, pkg_name, ver_str=None, pkg_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 			return pkg_info['info']['home_page']
 		except Exception as e:
@@ -244,7 +243,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_maintainers(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 
 			maintainer = pkg_info['info'].get('maintainer', None)
@@ -267,7 +266,7 @@ class PypiProxy(PackageManagerProxy):
 	def get_author(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		try:
 			if not pkg_info:
-				pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+				_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 			assert pkg_info and 'info' in pkg_info, "Failed to fetch metadata!"
 
 			author = pkg_info['info'].get('author', None)
@@ -6,10 +6,10 @@ import logging
 import re
 import os
 import inspect
-import requests
 import dateutil.parser
 from os.path import exists, join
 
+from packj.util.net import get_session
 from packj.util.job_util import exec_command
 from packj.audit.pm_proxy.pm_base import PackageManagerProxy
 
@@ -87,7 +87,7 @@ class RubygemsProxy(PackageManagerProxy):
 		# use rubygems API to get metadata
 		url = f'https://rubygems.org/api/v1/gems/{pkg_name}.json'
 		try:
-			resp = requests.request('GET', url)
+			resp = get_session().request('GET', url)
 			resp.raise_for_status()
 			pkg_info = resp.json()
 			if pkg_info:
@@ -101,7 +101,7 @@ class RubygemsProxy(PackageManagerProxy):
 
 	def get_version(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 		if not ver_str:
 			ver_str = pkg_info['version']
@@ -116,13 +116,13 @@ class RubygemsProxy(PackageManagerProxy):
 
 	def get_description(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 		return pkg_info.get('info', None)
 
 	def get_readme(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 		return pkg_info.get('documentation_uri')
 
@@ -131,7 +131,7 @@ class RubygemsProxy(PackageManagerProxy):
 		versions_url = f'https://rubygems.org/api/v1/versions/{pkg_name}.json'
 		try:
 			logging.debug("fetching versions info for %s" % (pkg_name))
-			resp = requests.request('GET', versions_url)
+			resp = get_session().request('GET', versions_url)
 			resp.raise_for_status()
 			ver_list = resp.json()
 		except Exception as e:
@@ -175,19 +175,19 @@ class RubygemsProxy(PackageManagerProxy):
 
 	def get_download_url(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 		return pkg_info.get('gem_uri', None)
 
 	def get_repo(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 		return pkg_info.get('source_code_uri', None)
 
 	def get_downloads(self, pkg_name, pkg_info):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 		downloads = pkg_info.get('downloads', None)
 		if downloads:
@@ -196,7 +196,7 @@ class RubygemsProxy(PackageManagerProxy):
 
 	def get_homepage(self, pkg_name, ver_str=None, pkg_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 		return pkg_info.get('homepage_uri', None)
 
@@ -205,7 +205,7 @@ class RubygemsProxy(PackageManagerProxy):
 		versions_url = f'https://rubygems.org/api/v1/versions/{pkg_name}.json'
 		try:
 			logging.debug("fetching versions info for %s" % (pkg_name))
-			versions_content = requests.request('GET', versions_url)
+			versions_content = get_session().request('GET', versions_url)
 			versions_info = json.loads(versions_content.text)
 		except:
 			logging.debug("fail in get_versions for pkg %s, ignoring!", pkg_name)
@@ -221,7 +221,7 @@ class RubygemsProxy(PackageManagerProxy):
 		try:
 			url = f'https://rubygems.org/api/v1/gems/{pkg_name}/reverse_dependencies.json'
 			logging.debug("fetching reverse_dependencies for %s", pkg_name)
-			resp = requests.request('GET', url)
+			resp = get_session().request('GET', url)
 			resp.raise_for_status()
 			return resp.json()
 		except Exception as e:
@@ -234,7 +234,7 @@ class RubygemsProxy(PackageManagerProxy):
 			assert uid, "NULL user ID!"
 			url = f'https://rubygems.org/api/v1/profiles/{uid}.json'
 			logging.debug("Fetching profile for user %s" % (uid))
-			resp = requests.request('GET', url)
+			resp = get_session().request('GET', url)
 			resp.raise_for_status()
 			return resp.json()
 		except Exception as e:
@@ -247,7 +247,7 @@ class RubygemsProxy(PackageManagerProxy):
 			assert pkg_name, "NULL pkg name!"
 			url = f'https://rubygems.org/api/v1/gems/{pkg_name}/owners.json'
 			logging.debug("Fetching owners for package %s" % (pkg_name))
-			resp = requests.request('GET', url)
+			resp = get_session().request('GET', url)
 			resp.raise_for_status()
 			return resp.json()
 		except Exception as e:
@@ -260,7 +260,7 @@ class RubygemsProxy(PackageManagerProxy):
 			assert uid, "NULL user ID!"
 			url = f'https://rubygems.org/api/v1/owners/{uid}/gems.json'
 			logging.debug("Fetching all gems for user %s" % (uid))
-			resp = requests.request('GET', url)
+			resp = get_session().request('GET', url)
 			resp.raise_for_status()
 			return resp.json()
 		except Exception as e:
@@ -297,7 +297,7 @@ class RubygemsProxy(PackageManagerProxy):
 
 	def get_maintainers(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 
 		owners = self.__owners(pkg_name)
@@ -306,7 +306,7 @@ class RubygemsProxy(PackageManagerProxy):
 	# use rubygems API to get num gems for this author
 	def get_author(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 
 		authors = pkg_info.get('authors', None)
@@ -315,7 +315,7 @@ class RubygemsProxy(PackageManagerProxy):
 	def get_dependencies(self, pkg_name, ver_str=None, pkg_info=None, ver_info=None):
 		# Alternatively, use gem dependency, but it is regex-based and tricky to parse.
 		if not pkg_info:
-			pkg_info = self.get_metadata(pkg_name=pkg_name, pkg_version=ver_str)
+			_, pkg_info = self.get_cached_metadata(pkg_name=pkg_name, pkg_version=ver_str)
 		assert pkg_info and 'version' in pkg_info, "Invalid metadata!"
 
 		if 'dependencies' in pkg_info and 'runtime' in pkg_info['dependencies']:
@@ -34,6 +34,8 @@ class Options():
 					help="Enable debugging", action="store_true")
 		parser_audit.add_argument("-t", "--trace", dest="trace", \
 				help="Install package(s) and collect dynamic/runtime traces", action="store_true")
+		parser_audit.add_argument("--no-cache", dest="no_cache", \
+				help="Do not reuse or store static analysis results", action="store_true")
 
 		# Audit positional args
 		parser_audit_group = parser_audit.add_argument_group(title='required arguments', description='Either --packages or --depfiles must be chosen.')
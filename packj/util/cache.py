@@ -0,0 +1,48 @@
+import time
+import threading
+import functools
+from collections import OrderedDict
+
+def ttl_cache(maxsize=1024, ttl=3600, cache_if=None):
+	"""
+	Memoize a function on its (hashable) args for @ttl seconds, evicting
+	least recently used entries beyond @maxsize. Exceptions are not cached,
+	nor are results for which @cache_if (if given) returns False.
+	Safe to use from concurrent threads.
+	"""
+	def decorator(func):
+		cache = OrderedDict()
+		lock = threading.Lock()
+
+		@functools.wraps(func)
+		def wrapper(*args, **kwargs):
+			key = (args, tuple(sorted(kwargs.items())))
+			now = time.monotonic()
+			with lock:
+				try:
+					expiry, value = cache[key]
+					if expiry > now:
+						cache.move_to_end(key)
+						return value
+					del cache[key]
+				except KeyError:
+					pass
+
+			value = func(*args, **kwargs)
+			if cache_if and not cache_if(value):
+				return value
+
+			with lock:
+				cache[key] = (now + ttl, value)
+				cache.move_to_end(key)
+				while len(cache) > maxsize:
+					cache.popitem(last=False)
+			return value
+
+		def cache_clear():
+			with lock:
+				cache.clear()
+
+		wrapper.cache_clear = cache_clear
+		return wrapper
+	return decorator
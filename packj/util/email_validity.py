@@ -1,7 +1,10 @@
-from pyisemail.diagnosis import ValidDiagnosis, InvalidDiagnosis, DNSDiagnosis 
+from pyisemail.diagnosis import InvalidDiagnosis, DNSDiagnosis 
 from pyisemail import is_email
 import sys
 import dns
+from concurrent.futures import ThreadPoolExecutor
+
+from packj.util.cache import ttl_cache
 
 popular_domains = [
 	"posteo.de",
@@ -42,6 +45,40 @@ popular_domains = [
 	"gmail.com",
 ]
 
+# MX/DNS validity is per-domain, not per-address, so cache it by domain
+@ttl_cache(maxsize=1024, ttl=3600)
+def check_domain_dns(domain):
+	ret = is_email(f'postmaster@{domain}', check_dns=True, diagnose=True)
+	return not isinstance(ret, (InvalidDiagnosis, DNSDiagnosis))
+
+def check_email_domains(addresses, max_workers=8):
+	"""
+	Resolve the domains of @addresses concurrently, warming the per-domain
+	cache used by check_email_address(). Like callers checking @addresses
+	in order, stops at the first missing or malformed address.
+	"""
+	domains = set()
+	for address in addresses:
+		try:
+			if not address or not is_email(address):
+				break
+			domain = address.split('@')[1]
+		except Exception:
+			break
+		if domain not in popular_domains:
+			domains.add(domain.lower())
+	if len(domains) < 2:
+		return
+
+	def resolve(domain):
+		try:
+			check_domain_dns(domain)
+		except Exception:
+			pass
+
+	with ThreadPoolExecutor(max_workers=max_workers) as executor:
+		list(executor.map(resolve, domains))
+
 def check_email_address(address):
 	if not address:
 		return False, False
@@ -56,16 +93,10 @@ def check_email_address(address):
 		return False, False
 	
 	if domain not in popular_domains:
+		if not bool_result:
+			return False, False
 		try:
-			ret = is_email(address, check_dns=True, diagnose=True)
-			if isinstance(ret, ValidDiagnosis) and ret.code == 0:
-				# "Address is valid."
-				return True, True
-			elif isinstance(ret, InvalidDiagnosis):
-				return False, False
-			elif isinstance(ret,  DNSDiagnosis):
-				return bool_result, False
-
+			bool_result_with_dns = check_domain_dns(domain.lower())
 		except Exception as e:
 			print("EXCEPTION: %s" % (str(e)))
 			bool_result_with_dns = False
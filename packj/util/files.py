@@ -1,7 +1,11 @@
-from packj.util.json_wrapper import json_loads
 from packj.util.job_util import md5_digest_file
 import os
 
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
 def dir_file_count_and_size(path:str):
 	from pathlib import Path
 	stats = [p.stat().st_size for p in Path(path).rglob('*')]
@@ -113,12 +117,14 @@ def read_dict_from_file(filename):
 
 def read_json_from_file(filepath):
 	try:
+		with open(filepath, "rb") as f:
+			data = f.read()
+		# python3 strings are already unicode, so skip json_wrapper's byteify
+		# pass, which rebuilds every list and dict of the document
+		if orjson:
+			return orjson.loads(data)
 		import json
-	except ImportError as e:
-		raise Exception("'json' module not available. Please install.")
-	try:
-		with open(filepath, "r") as f:
-			return json_loads(f.read())
+		return json.loads(data)
 	except Exception as e:
 		raise Exception("Failed to load json data from file %s: %s" % (filepath, str(e)))
 
@@ -134,12 +140,17 @@ def read_from_csv(filename, skip_header=False):
 
 def write_json_to_file(filepath, data_json, indent=0):
 	try:
-		import json
-	except ImportError as e:
-		raise Exception("'json' module not available. Please install.")
-	try:
-		with open(filepath, "w+") as f:
-			json.dump(data_json, f, indent=indent)
+		# orjson is much faster, but only supports 2-space indentation
+		if orjson:
+			option = orjson.OPT_NON_STR_KEYS
+			if indent:
+				option |= orjson.OPT_INDENT_2
+			with open(filepath, "wb+") as f:
+				f.write(orjson.dumps(data_json, option=option))
+		else:
+			import json
+			with open(filepath, "w+") as f:
+				json.dump(data_json, f, indent=indent)
 	except Exception as e:
 		raise Exception("Failed to dump json content to file %s: %s" % (filepath, str(e)))
 
@@ -1,5 +1,42 @@
 from packj.util.dates import curr_timestamp
+from packj.util.cache import ttl_cache
 import os
+import threading
+
+# shared across threads, so that HTTP calls reuse pooled keep-alive connections
+_session = None
+_probe_session = None
+_session_lock = threading.Lock()
+
+def __new_session(pool_size, retry):
+	import requests
+	from requests.adapters import HTTPAdapter
+	session = requests.Session()
+	adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+	session.mount('https://', adapter)
+	session.mount('http://', adapter)
+	session.headers.update({'User-Agent': 'packj'})
+	return session
+
+def get_session(pool_size=32, retries=2):
+	global _session
+	with _session_lock:
+		if not _session:
+			from urllib3.util.retry import Retry
+			_session = __new_session(pool_size, Retry(total=retries, backoff_factor=0.2))
+		return _session
+
+def get_probe_session(pool_size=32):
+	"""
+	Session for probing arbitrary sites (e.g., homepages): retries a failed
+	connect once, but never a read, so that a slow site costs one timeout.
+	"""
+	global _probe_session
+	with _session_lock:
+		if not _probe_session:
+			from urllib3.util.retry import Retry
+			_probe_session = __new_session(pool_size, Retry(total=2, connect=1, read=0, backoff_factor=0.2))
+		return _probe_session
 
 def ipv4_to_ipv6(ip_addr):
 	numbers = list(map(int, ip_addr.split('.')))
@@ -27,9 +64,23 @@ def __open_url(url):
 	except Exception as e:
 		raise Exception(str(e))
 
-def check_domain_popular(url):													
+# top domains list is large and changes rarely, so fetch it once a day
+@ttl_cache(maxsize=1, ttl=86400)
+def get_popular_domains():
+	from io import BytesIO
+	from zipfile import ZipFile
+	domain_list_url = 'http://s3.amazonaws.com/alexa-static/top-1m.csv.zip'
+	resp = __open_url(domain_list_url)
+	zipfile = ZipFile(BytesIO(resp.read()))
+	domain_list = set()
+	for line in zipfile.open(zipfile.namelist()[0]).readlines():
+		rank, dom = line.strip().decode('utf-8').split(',')
+		domain_list.add(dom)
+	return frozenset(domain_list)
+
+def check_domain_popular(url):
 	try:
-		url_parts = __parse_url(url)												
+		url_parts = __parse_url(url)
 		from tldextract import extract
 		subdomain, domain, suffix = extract(url)
 	except Exception as e:
@@ -37,52 +88,50 @@ def check_domain_popular(url):
 		return False
 
 	try:
-		from io import BytesIO
-		from zipfile import ZipFile
-		domain_list_url = 'http://s3.amazonaws.com/alexa-static/top-1m.csv.zip'		
-		resp = __open_url(domain_list_url)
-		zipfile = ZipFile(BytesIO(resp.read()))
-		domain_list = []
-		for line in zipfile.open(zipfile.namelist()[0]).readlines():				
-			rank, dom = line.strip().decode('utf-8').split(',')					
-			domain_list.append(dom)												
-		return domain in domain_list and url_parts.path==''
-	except Exception as e:															
-		print("check_domain_popular (%s): %s" % (url, str(e)))						
-		return False
-
-def check_site_exist(url, check_validity=False):
-	try:
-		if check_validity:
-			url_parts = __parse_url(url)
+		return domain in get_popular_domains() and url_parts.path==''
 	except Exception as e:
-		return False, "Invalid URL (%s)" % (str(e))
+		print("check_domain_popular (%s): %s" % (url, str(e)))
+		return False
 
+# only definitive outcomes are cached, transient network errors are retried
+@ttl_cache(maxsize=1024, ttl=3600, cache_if=lambda ret: ret[2])
+def __probe_site(url):
 	resp = None
 	try:
 		import requests
-		resp = requests.head(url, allow_redirects=False, verify=True, timeout=30)
+		resp = get_probe_session().head(url, allow_redirects=False, verify=True, timeout=30)
 		resp.raise_for_status()
 		if resp.status_code == 200:
-			return True, "OK"
+			return True, "OK", True
 		elif resp.status_code == 302:
-			return False, "redirects to another page"
-		return False, str(resp.status_code)
+			return False, "redirects to another page", True
+		return False, str(resp.status_code), True
 	except requests.exceptions.SSLError:
-		return False, "invalid SSL certificate, vulnerable to MITM attack"
+		return False, "invalid SSL certificate, vulnerable to MITM attack", True
 	except requests.exceptions.ConnectionError as ce:
-		return False, "nonexistent page, failed to connect"
+		return False, "nonexistent page, failed to connect", False
 	except requests.exceptions.HTTPError as he:
-		# http status codes 400,500, ...
-		return False, "invalid http response, code %s" % (str(resp.status_code) if resp else 'None')
+		# http status codes 400,500, ...; server errors may be transient
+		return False, "invalid http response, code %s" % (str(resp.status_code) if resp else 'None'), \
+			resp is not None and resp.status_code < 500
 	except requests.exceptions.Timeout as te:
 		# status code 408
-		return False, "connection timed out"
+		return False, "connection timed out", False
 	except Exception as e:
 		#print("check_site_exist (%s): %s" % (url, str(e)))
-		return False, str(e)
+		return False, str(e), False
+
+def check_site_exist(url, check_validity=False):
+	try:
+		if check_validity:
+			url_parts = __parse_url(url)
+	except Exception as e:
+		return False, "Invalid URL (%s)" % (str(e))
+
+	valid, reason, _ = __probe_site(url)
+	return valid, reason
 
-def download_file(url, filepath=None, mode='wb+'):
+def download_file(url, filepath=None, mode='wb+', chunk_size=1<<20, timeout=30):
 	assert url, "NULL url"
 	if not filepath:
 		import tempfile
@@ -97,7 +146,7 @@ def download_file(url, filepath=None, mode='wb+'):
 		# fetch and write to file
 		size = 0
 		with open(filepath, mode) as f:
-			for content in make_request_stream(url, stream_size=8192):
+			for content in make_request_stream(url, stream_size=chunk_size, timeout=timeout):
 				f.write(content)
 				size += len(content)
 		return filepath, size
@@ -107,7 +156,7 @@ def download_file(url, filepath=None, mode='wb+'):
 def make_request(url, headers=None, params=None):
 	try:
 		import requests
-		resp = requests.get(url=url, headers=headers, params=params)
+		resp = get_session().get(url=url, headers=headers, params=params)
 		resp.raise_for_status()
 		return resp
 	except ImportError as e:
@@ -116,10 +165,10 @@ def make_request(url, headers=None, params=None):
 	except Exception as e:
 		raise Exception("Failed to make request: %s" % (str(e)))
 
-def make_request_stream(url, stream_size, headers=None, params=None):
+def make_request_stream(url, stream_size, headers=None, params=None, timeout=None):
 	try:
 		import requests
-		with requests.get(url=url, headers=headers, params=params, stream=True) as resp:
+		with get_session().get(url=url, headers=headers, params=params, stream=True, timeout=timeout) as resp:
 			resp.raise_for_status()
 			for chunk in resp.iter_content(stream_size):
 				yield chunk
@@ -9,7 +9,7 @@ from distutils import log as distutils_logger
 import setuptools
 
 import shutil
-import os, sys, subprocess
+import os, re, sys, subprocess
 
 here = os.path.abspath(os.path.dirname(__file__))
 
@@ -17,6 +17,9 @@ here = os.path.abspath(os.path.dirname(__file__))
 long_description = open(os.path.join(here, "README.md")).read()
 long_description_content_type = 'text/markdown'
 
+# single source of truth for the version
+VERSION = re.search(r"__version__ = '([^']+)'", open(os.path.join(here, 'packj', '__init__.py')).read()).group(1)
+
 # this grabs the requirements from requirements.txt
 REQUIREMENTS = [i.strip().split('==')[0] for i in open(os.path.join(here, "requirements.txt")).readlines()]
 
@@ -76,7 +79,7 @@ setup(
 	data_files = [
 		(os.path.expanduser('~'), ['.packj.yaml']),
 	],
-	version = '0.13',
+	version = VERSION,
 	license='GNU AGPLv3',
 	description = 'Packj flags "risky" open-source packages in your software supply chain',
 	long_description=long_description,